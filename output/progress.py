@@ -10,6 +10,63 @@ from output.utils import get_term_size
 
 __docformat__ = 'epytext'
 
+# Unicode block elements used by the block mode of TermProgressBar. Index n
+# holds the glyph for a cell filled by n eighths.
+_FULL_BLOCK = u'\u2588'
+_PARTIAL_BLOCKS = (
+    u'', u'\u258f', u'\u258e', u'\u258d', u'\u258c', u'\u258b', u'\u258a',
+    u'\u2589')
+
+# Maps (width, encoding) to a lookup table, see _get_block_table().
+_block_tables = {}
+
+
+def _get_block_table(width, encoding=None):
+    """
+    Returns a list of pre-rendered block bars for the given width, indexed by
+    the number of filled eighths (0 to 8 * width). Each entry is padded with
+    spaces to width cells. A width below 0 is treated as 0. If encoding is
+    given, the entries are byte strings in that encoding. Tables are built
+    once per width and encoding and cached.
+    """
+    width = max(width, 0)
+    key = (width, encoding)
+    table = _block_tables.get(key)
+    if table is None:
+        table = []
+        for eighths in range(8 * width + 1):
+            full, partial = divmod(eighths, 8)
+            bar = (full * _FULL_BLOCK) + _PARTIAL_BLOCKS[partial]
+            bar += (width - full - (partial and 1)) * u' '
+            if encoding is not None:
+                bar = bar.encode(encoding)
+            table.append(bar)
+        _block_tables[key] = table
+    return table
+
+
+def _get_block_encoding(fd):
+    """
+    Returns the encoding block bars are written to fd with, or None if that
+    encoding can't represent the block elements. Streams without an encoding
+    (e.g. a pipe on Python 2) are assumed to be UTF-8.
+    """
+    encoding = getattr(fd, 'encoding', None) or 'utf-8'
+    try:
+        (_FULL_BLOCK + u''.join(_PARTIAL_BLOCKS)).encode(encoding)
+    except (LookupError, UnicodeError):
+        return None
+    return encoding
+
+
+def _scale(value, maxval, units):
+    """
+    Returns the number of whole units (out of units) that value fills of
+    maxval. Uses integer arithmetic for integer values, so that rendering and
+    next_visible_value() agree exactly.
+    """
+    return int(value * units // maxval)
+
 
 class ProgressBar(object):
     """
@@ -98,13 +155,27 @@ class ProgressBar(object):
 class TermProgressBar(ProgressBar):
     """
     A tty progress bar similar to wget's.
+
+    If blocks is True, the bar is drawn with Unicode block elements instead
+    of C{=} characters, which gives a resolution of an eighth of a cell. This
+    requires fd to use an encoding able to represent them, usually UTF-8;
+    otherwise the C{=} bar is drawn. On Python 2 the bar is encoded to the
+    encoding of fd and so is a unicode title or label.
     """
-    def __init__(self, fd=sys.stdout, **kwargs):
+    def __init__(self, fd=sys.stdout, blocks=False, **kwargs):
         ProgressBar.__init__(self, **kwargs)
         lines, self.term_columns = get_term_size(fd)
         self.file = fd
+        encoding = _get_block_encoding(fd) if blocks else None
+        # Fall back to the ASCII bar if fd can't display block elements
+        self._blocks = encoding is not None
+        # Python 2 streams take byte strings, so bars are encoded up front
+        self._encoding = None
+        if self._blocks and sys.hexversion < 0x3000000:
+            self._encoding = encoding
         self._min_columns = 11
         self._max_columns = 80
+        self._percentage_str_width = 5
         # For indeterminate mode, ranges from 0.0 to 1.0
         self._position = 0.0
 
@@ -117,21 +188,65 @@ class TermProgressBar(ProgressBar):
         self.file.write(image)
         self.file.flush()
 
+    def next_visible_value(self):
+        """
+        Returns the smallest value curval has to reach for the rendered image
+        to change, i.e. the next step of either the percentage or the bar.
+        Calls to set() with a lower value (and unchanged maxval, title and
+        label) produce the same image and may be skipped. Returns None if the
+        bar is indeterminate or already full. For integer values the result
+        is an integer greater than curval.
+        """
+        maxval = self._maxval
+        curval = self._curval
+        if maxval == 0 or curval >= maxval:
+            return None
+        steps = [100]
+        cols = self._get_columns()
+        if cols >= self._min_columns:
+            bar_units = self._get_bar_width(cols)
+            if self._blocks:
+                bar_units *= 8
+            if bar_units > 0:
+                steps.append(bar_units)
+        threshold = maxval
+        for units in steps:
+            # Smallest value whose scaled units exceed the current ones
+            value = -(-(_scale(curval, maxval, units) + 1) * maxval // units)
+            if value < threshold:
+                threshold = value
+        return threshold
+
+    def _get_columns(self):
+        return min(self.term_columns, self._max_columns)
+
+    def _get_bar_space(self, cols):
+        square_brackets_width = 2
+        bar_space = cols - self._percentage_str_width - square_brackets_width - 1
+        if self._desc:
+            bar_space -= self._desc_max_length
+        return bar_space
+
+    def _get_bar_width(self, cols):
+        """
+        Returns the number of cells the determinate bar is quantized to. The
+        block mode uses the cell otherwise taken by the C{>} arrow.
+        """
+        bar_space = self._get_bar_space(cols)
+        if self._blocks:
+            return bar_space
+        return bar_space - 1
+
     def _create_image(self):
-        cols = self.term_columns
-        if cols > self._max_columns:
-            cols = self._max_columns
+        cols = self._get_columns()
         min_columns = self._min_columns
         curval = self._curval
         maxval = self._maxval
         position = self._position
-        percentage_str_width = 5
-        square_brackets_width = 2
+        percentage_str_width = self._percentage_str_width
         if cols < percentage_str_width:
             return ""
-        bar_space = cols - percentage_str_width - square_brackets_width - 1
-        if self._desc:
-            bar_space -= self._desc_max_length
+        bar_space = self._get_bar_space(cols)
         if maxval == 0:
             max_bar_width = bar_space - 3
             _percent = "".ljust(percentage_str_width)
@@ -157,15 +272,22 @@ class TermProgressBar(ProgressBar):
                     '<=>' + ((max_bar_width - bar_width) * ' ') + ']')
             return image
         else:
-            percentage = int(100 * float(curval) / maxval)
-            max_bar_width = bar_space - 1
+            percentage = _scale(curval, maxval, 100)
+            max_bar_width = self._get_bar_width(cols)
             _percent = ('%d%% ' % percentage).rjust(percentage_str_width)
             image = '%s%s' % (self._desc, _percent)
 
             if cols < min_columns:
                 return image
-            offset = float(curval) / maxval
-            bar_width = int(offset * max_bar_width)
+            if self._blocks:
+                table = _get_block_table(max_bar_width, self._encoding)
+                if self._encoding is not None and \
+                        isinstance(image, type(u'')):
+                    image = image.encode(self._encoding)
+                return ''.join((
+                    image, '[',
+                    table[_scale(curval, maxval, len(table) - 1)], ']'))
+            bar_width = _scale(curval, maxval, max_bar_width)
             image = (
                 image + '[' + (bar_width * '=') + '>' + ((max_bar_width - bar_width) * ' ') + ']')
             return image
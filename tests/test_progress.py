@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from output.progress import TermProgressBar, _get_block_table
+
+
+class _NullFile(object):
+    def __init__(self, encoding='utf-8'):
+        self.encoding = encoding
+        self.written = []
+
+    def write(self, s):
+        self.written.append(s)
+
+    def flush(self):
+        pass
+
+
+def _make_bar(blocks=True, columns=80, encoding='utf-8', **kwargs):
+    pb = TermProgressBar(fd=_NullFile(encoding), blocks=blocks, **kwargs)
+    pb.term_columns = columns
+    return pb
+
+
+def _image(pb):
+    image = pb._create_image()
+    if isinstance(image, bytes):  # Python 2 block images are encoded
+        image = image.decode('utf-8')
+    return image
+
+
+class BlockTableTest(unittest.TestCase):
+    def test_entry_per_eighth(self):
+        table = _get_block_table(2)
+        self.assertEqual(len(table), 17)
+        self.assertEqual(table[0], u'  ')
+        self.assertEqual(table[1], u'▏ ')
+        self.assertEqual(table[4], u'▌ ')
+        self.assertEqual(table[7], u'▉ ')
+        self.assertEqual(table[8], u'█ ')
+        self.assertEqual(table[9], u'█▏')
+        self.assertEqual(table[16], u'██')
+        for entry in table:
+            self.assertEqual(len(entry), 2)
+
+    def test_table_is_cached(self):
+        self.assertTrue(_get_block_table(5) is _get_block_table(5))
+
+    def test_non_positive_width(self):
+        self.assertEqual(_get_block_table(0), [u''])
+        self.assertEqual(_get_block_table(-3), [u''])
+
+
+class BlockImageTest(unittest.TestCase):
+    def test_narrow_terminal(self):
+        for columns in range(0, 40):
+            pb = _make_bar(columns=columns, title='hello')
+            pb.set(50, 100)
+            image = _image(pb)
+            if columns < 5:
+                self.assertEqual(image, u'')
+            elif columns < 11:
+                self.assertEqual(image, pb._desc + u' 50% ')
+            elif columns <= 33:
+                # The description leaves no space for the bar
+                self.assertEqual(image, pb._desc + u' 50% []')
+            else:
+                bar = image[len(pb._desc + u' 50% '):]
+                self.assertEqual(len(bar), columns - 31, image)
+                self.assertTrue(bar.startswith(u'[') and bar.endswith(u']'))
+                self.assertNotEqual(bar.strip(u'[ ]'), u'')
+
+    def test_unsupported_encoding(self):
+        for encoding in ('ascii', 'latin-1', 'cp1252'):
+            pb = _make_bar(columns=40, encoding=encoding)
+            pb.set(3, 7)
+            self.assertEqual(
+                pb.file.written[-1], u' 42% [' + 13 * u'=' + u'>' + 18 * u' ' + u']')
+
+    def test_same_width_as_ascii_bar(self):
+        for blocks in (False, True):
+            pb = _make_bar(blocks=blocks)
+            pb.set(333, 1000)
+            self.assertEqual(len(_image(pb)), 79)
+
+
+class NextVisibleValueTest(unittest.TestCase):
+    def _check(self, pb, maxval):
+        pb.set(0, maxval)
+        image = _image(pb)
+        threshold = pb.next_visible_value()
+        for value in range(1, maxval + 1):
+            self.assertTrue(threshold > pb.curval)
+            pb.set(value)
+            new_image = _image(pb)
+            if value < threshold:
+                self.assertEqual(new_image, image)
+            else:
+                self.assertEqual(value, threshold)
+                self.assertNotEqual(new_image, image)
+            image = new_image
+            threshold = pb.next_visible_value()
+        self.assertTrue(threshold is None)
+
+    def test_thresholds(self):
+        for blocks in (False, True):
+            for maxval in (7, 100, 1000, 1237):
+                for columns in (10, 40, 80):
+                    for title in (None, 'Job'):
+                        pb = _make_bar(
+                            blocks=blocks, columns=columns, title=title)
+                        self._check(pb, maxval)
+
+    def test_indeterminate(self):
+        pb = _make_bar()
+        self.assertTrue(pb.next_visible_value() is None)
+
+
+if __name__ == '__main__':
+    unittest.main()